@@ -1,8 +1,70 @@
 from sqladmin import Admin, ModelView
+from sqlalchemy import select, text
+from sqlalchemy.orm import defer, joinedload
+from starlette.requests import Request
 import models
 
+# Below this many (estimated) rows an exact COUNT(*) is cheap, so we keep it.
+EXACT_COUNT_THRESHOLD = 100_000
+LIST_TEXT_PREVIEW = 80
+
+# Planner row estimate. Partitioned parents (relkind 'p', e.g. call_logs) are
+# never analyzed themselves, so sum the leaf partitions instead.
+ESTIMATED_COUNT_SQL = """
+    SELECT CASE WHEN c.relkind = 'p' THEN (
+               SELECT coalesce(sum(greatest(p.reltuples, 0)), 0)
+               FROM pg_partition_tree(c.oid) t JOIN pg_class p ON p.oid = t.relid
+               WHERE t.isleaf
+           ) ELSE c.reltuples END::bigint
+    FROM pg_class c WHERE c.oid = to_regclass(:table)
+"""
+
+
+def truncate(value, length=LIST_TEXT_PREVIEW):
+    """Short preview of a long text column for list pages."""
+    if not value:
+        return value
+    return value if len(value) <= length else value[:length].rstrip() + "…"
+
+
 # ==========================================
-# 0. ADMIN DASHBOARD SETUP
+# 0. BASE VIEW (Tuned for large tables)
+# ==========================================
+
+class ScalableModelView(ModelView):
+    """
+    ModelView that stays fast on tables with millions of rows:
+    - pagination uses the planner estimate (pg_class.reltuples) instead of COUNT(*),
+      summed over partitions for partitioned tables
+    - sorting is restricted to column_sortable_list (which should be indexed)
+    """
+    page_size = 25
+    page_size_options = [25, 50, 100]
+
+    async def count(self, request, stmt=None):
+        # Searches are filtered, so the table estimate would be wrong -> exact count
+        if stmt is not None:
+            return await super().count(request, stmt)
+
+        rows = await self._run_query(
+            text(ESTIMATED_COUNT_SQL).bindparams(table=self.model.__tablename__)
+        )
+        estimate = rows[0] if rows else -1
+
+        # reltuples is -1 (or tiny) until the table/partitions have been ANALYZEd
+        if estimate < EXACT_COUNT_THRESHOLD:
+            return await super().count(request)
+        return estimate
+
+    def sort_query(self, stmt, request):
+        # Ignore hand-crafted ?sortBy= on unindexed columns -> default sort
+        if request.query_params.get("sortBy") not in (None, *self._sort_fields):
+            request = Request({**request.scope, "query_string": b""})
+        return super().sort_query(stmt, request)
+
+
+# ==========================================
+# 1. ADMIN VIEWS
 # ==========================================
 
 class DoctorAdmin(ModelView, model=models.Doctor):
@@ -10,54 +72,81 @@ class DoctorAdmin(ModelView, model=models.Doctor):
     name_plural = "Doctors"
     icon = "fa-solid fa-user-doctor"
     column_list = [
-        models.Doctor.id, 
-        models.Doctor.name, 
-        models.Doctor.specialization, 
+        models.Doctor.id,
+        models.Doctor.name,
+        models.Doctor.specialization,
         models.Doctor.city,
         models.Doctor.hospital
     ]
 
-class ClientAdmin(ModelView, model=models.Client):
+class ClientAdmin(ScalableModelView, model=models.Client):
     name = "Patient"
     name_plural = "Patients"
     icon = "fa-solid fa-user-injured"
     column_list = [
-        models.Client.id, 
-        models.Client.name, 
+        models.Client.id,
+        models.Client.name,
         models.Client.phone,
         models.Client.zipcode
     ]
     column_searchable_list = [models.Client.name, models.Client.phone]
+    column_sortable_list = [models.Client.id, models.Client.phone]
+    column_default_sort = (models.Client.id, True)
 
-class AppointmentAdmin(ModelView, model=models.Appointment):
+class AppointmentAdmin(ScalableModelView, model=models.Appointment):
     name = "Appointment"
     name_plural = "Appointments"
     icon = "fa-solid fa-calendar-check"
     column_list = [
-        models.Appointment.id, 
-        models.Appointment.client_id, 
-        models.Appointment.doctor_id, 
-        models.Appointment.appointment_date, 
-        models.Appointment.appointment_time, 
+        models.Appointment.id,
+        models.Appointment.client_id,
+        models.Appointment.doctor_id,
+        models.Appointment.appointment_date,
+        models.Appointment.appointment_time,
         models.Appointment.status
     ]
+    column_labels = {
+        models.Appointment.client_id: "Patient",
+        models.Appointment.doctor_id: "Doctor",
+    }
+    # Show names instead of raw IDs (client/doctor are joined in list_query)
+    column_formatters = {
+        models.Appointment.client_id: lambda m, a: m.client.name if m.client else m.client_id,
+        models.Appointment.doctor_id: lambda m, a: m.doctor.name if m.doctor else m.doctor_id,
+    }
+    column_sortable_list = [models.Appointment.id, models.Appointment.appointment_date]
+    column_default_sort = (models.Appointment.id, True)
+
+    def list_query(self, request):
+        # One JOINed query per page instead of a lookup per row
+        return select(models.Appointment).options(
+            joinedload(models.Appointment.client),
+            joinedload(models.Appointment.doctor),
+        )
 
-class CallLogAdmin(ModelView, model=models.CallLog):
+class CallLogAdmin(ScalableModelView, model=models.CallLog):
     name = "Triage Log"
     name_plural = "Triage Logs"
     icon = "fa-solid fa-file-medical"
-    
+
     # --- FIXED COLUMNS (Matches your new Schema) ---
     column_list = [
-        models.CallLog.id, 
+        models.CallLog.id,
         models.CallLog.client_id,    # Link to the patient
         models.CallLog.specialty,    # "Dermatology"
         models.CallLog.urgency_score,# 1-10
         models.CallLog.status,       # "NEW"
-        models.CallLog.summary,      # "Patient reports..."
+        models.CallLog.summary,      # "Patient reports..." (truncated)
         models.CallLog.created_at
     ]
-    
+    column_labels = {models.CallLog.client_id: "Patient"}
+    column_formatters = {
+        models.CallLog.client_id: lambda m, a: m.client.name if m.client else m.client_id,
+        models.CallLog.summary: lambda m, a: truncate(m.summary),
+    }
+    column_sortable_list = [models.CallLog.id, models.CallLog.created_at]
+    column_default_sort = (models.CallLog.created_at, True)
+
     # Detail view to see the long JSON data
     can_view_details = True
     column_details_list = [
@@ -69,6 +158,22 @@ class CallLogAdmin(ModelView, model=models.CallLog):
         models.CallLog.extracted_keywords,  # JSON data
         models.CallLog.transcript
     ]
+    column_formatters_detail = {
+        models.CallLog.transcript: lambda m, a: (
+            f"[Archived] GET /patient_requests/{m.id}" if m.transcript_archived else m.transcript
+        ),
+    }
+
+    def list_query(self, request):
+        # Heavy columns are only needed on the detail page
+        return select(models.CallLog).options(
+            joinedload(models.CallLog.client),
+            defer(models.CallLog.transcript),
+            defer(models.CallLog.symptoms),
+            defer(models.CallLog.patient_quotes),
+            defer(models.CallLog.extracted_keywords),
+            defer(models.CallLog.ai_action_summary),
+        )
 
 def setup_admin(app, engine):
     admin = Admin(app, engine)
@@ -76,4 +181,4 @@ def setup_admin(app, engine):
     admin.add_view(ClientAdmin)
     admin.add_view(AppointmentAdmin)
     admin.add_view(CallLogAdmin)
-    return admin
\ No newline at end of file
+    return admin
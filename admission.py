@@ -0,0 +1,173 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ==========================================
+# ADMISSION CONTROL FOR VOICE TOOL CALLS
+# Vapi keeps the caller in silence while we work, so every tool call gets a
+# latency budget. Excess work is queued briefly or shed, and the caller always
+# hears *something* before the budget runs out.
+# ==========================================
+
+class AdmissionRejected(Exception):
+    """Request was shed or ran past its budget; reply with the busy message."""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason  # "shed" | "queue_timeout" | "deadline"
+
+
+class AdmissionController:
+    def __init__(self, name, budget_s, max_in_flight, max_queue, busy_message, retry_message):
+        self.name = name
+        self.budget_s = budget_s
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.busy_message = busy_message    # work is still running ("deadline")
+        self.retry_message = retry_message  # work never started ("shed" / "queue_timeout")
+
+        self._slots = None  # asyncio.Semaphore, created lazily on the running loop
+        self.in_flight = 0
+        self.queued = 0
+        self.completed = 0
+        self.shed = 0
+        self.queue_timeouts = 0
+        self.deadline_exceeded = 0
+        self.max_queue_seen = 0
+
+    async def run(self, fn, *args, deadline=None, on_done=None):
+        """
+        Runs the blocking `fn(*args)` in a worker thread within the budget.
+        The slot is held until the thread really finishes (even after we have
+        answered the caller), so a slow DB can't pile up unbounded work.
+
+        `deadline` (time.monotonic()) lets a caller that already spent part of
+        the budget, e.g. waiting on locks, pass in what's left. `on_done` is
+        called exactly once: when the thread finishes, or right away if the
+        work never started.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+
+        if deadline is None:
+            deadline = time.monotonic() + self.budget_s
+
+        started = False
+        try:
+            if self.in_flight + self.queued >= self.max_in_flight + self.max_queue:
+                self.shed += 1
+                raise AdmissionRejected("shed")
+
+            self.queued += 1
+            self.max_queue_seen = max(self.max_queue_seen, self.queued)
+            try:
+                await asyncio.wait_for(self._slots.acquire(), max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                self.queue_timeouts += 1
+                raise AdmissionRejected("queue_timeout")
+            finally:
+                self.queued -= 1
+
+            self.in_flight += 1
+            task = asyncio.get_running_loop().run_in_executor(tool_executor(), fn, *args)
+            task.add_done_callback(lambda t: self._release(t, on_done))
+            started = True
+        finally:
+            if not started and on_done:
+                on_done()
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            self.deadline_exceeded += 1
+            raise AdmissionRejected("deadline")
+
+    def reject(self, reason):
+        """Counts a request turned away before reaching run() (e.g. lock wait timed out)."""
+        if reason == "shed":
+            self.shed += 1
+        elif reason == "queue_timeout":
+            self.queue_timeouts += 1
+        else:
+            self.deadline_exceeded += 1
+        return self.message_for(reason)
+
+    def message_for(self, reason):
+        # Only "deadline" means the work is actually under way
+        return self.busy_message if reason == "deadline" else self.retry_message
+
+    def _release(self, task, on_done=None):
+        self.in_flight -= 1
+        self.completed += 1
+        self._slots.release()
+        if on_done:
+            on_done()
+        if not task.cancelled() and task.exception():
+            print(f"❌ [{self.name}] background error: {task.exception()}")
+
+    def stats(self):
+        return {
+            "budget_ms": int(self.budget_s * 1000),
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queued,
+            "max_queue_depth_seen": self.max_queue_seen,
+            "completed": self.completed,
+            "shed": self.shed,
+            "queue_timeouts": self.queue_timeouts,
+            "deadline_exceeded": self.deadline_exceeded,
+        }
+
+
+# ==========================================
+# PER-ROUTE BUDGETS
+# Total max_in_flight stays under the SQLAlchemy pool (5 + 10 overflow).
+# busy_message: the work is still running when the budget ends.
+# retry_message: the work never started (shed / queued too long).
+# ==========================================
+CONTROLLERS = {
+    "find_doctors": AdmissionController(
+        "find_doctors", budget_s=3.0, max_in_flight=6, max_queue=16,
+        busy_message="One moment please, I'm still checking which doctors are available. Could you give me just a second?",
+        retry_message="Sorry, I couldn't check the doctors just yet. Let me try that again.",
+    ),
+    "book_appointment": AdmissionController(
+        "book_appointment", budget_s=4.0, max_in_flight=4, max_queue=16,
+        busy_message="One moment please, I'm still confirming that booking. Please hold on while I check it went through.",
+        retry_message="Sorry, I couldn't get to that booking yet, so nothing has been booked. Let me try again.",
+    ),
+    "save_call_log": AdmissionController(
+        "save_call_log", budget_s=4.0, max_in_flight=4, max_queue=32,
+        busy_message="One moment please, I'm still saving your details.",
+        retry_message="Sorry, I couldn't save your details just yet. Let me try again.",
+    ),
+}
+
+# Tool work runs on its own pool, one thread per in-flight slot. The loop's
+# default executor (min(32, cpus + 4) threads) can be smaller than the caps,
+# which would leave "in flight" work silently queued behind it.
+_executor = None
+
+def tool_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=sum(c.max_in_flight for c in CONTROLLERS.values()),
+            thread_name_prefix="tool-call",
+        )
+    return _executor
+
+
+async def admit(route, fn, *args, deadline=None, on_done=None):
+    """Runs `fn(*args)` under the route's controller; returns the busy/retry message if rejected."""
+    controller = CONTROLLERS[route]
+    try:
+        return await controller.run(fn, *args, deadline=deadline, on_done=on_done)
+    except AdmissionRejected as e:
+        print(f"⏳ [{route}] {e.reason}, replying with hold message")
+        return controller.message_for(e.reason)
+
+
+def admission_stats():
+    return {name: controller.stats() for name, controller in CONTROLLERS.items()}
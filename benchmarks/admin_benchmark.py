@@ -0,0 +1,144 @@
+"""
+Benchmark: admin list pages at 1M call logs / appointments.
+
+Compares the default sqladmin queries (exact COUNT(*), all columns, lazy
+client/doctor lookups) with the ones used by ScalableModelView.
+
+    python -m benchmarks.admin_benchmark            # seeds 1M rows if needed
+    python -m benchmarks.admin_benchmark --rows 200000
+
+WARNING: inserts synthetic rows into the database in DATABASE_URL.
+"""
+import argparse
+import time
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import defer, joinedload
+
+from admin_panel import ESTIMATED_COUNT_SQL
+from database import SessionLocal, engine
+import models
+
+PAGE_SIZE = 25
+
+
+def timed(label, fn, repeat=5):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"   {label:<45} {best * 1000:9.2f} ms")
+    return result
+
+
+def seed(db, rows):
+    existing = db.execute(select(func.count(models.CallLog.id))).scalar()
+    if existing >= rows:
+        print(f"   - call_logs already has {existing} rows, skipping seed.")
+        return
+
+    print(f"\n🌱 SEEDING {rows} CALL LOGS + APPOINTMENTS...")
+    db.execute(text("""
+        INSERT INTO clients (name, phone, zipcode)
+        SELECT 'Bench Patient ' || g, 'bench-' || g, lpad((g % 99999)::text, 5, '0')
+        FROM generate_series(1, 10000) g
+        ON CONFLICT (phone) DO NOTHING
+    """))
+    db.execute(text("""
+        INSERT INTO call_logs (vapi_call_id, client_id, specialty, summary, symptoms,
+                               patient_quotes, extracted_keywords, transcript,
+                               ai_action_summary, urgency_score, status, created_at)
+        SELECT 'bench-' || g,
+               (SELECT id FROM clients WHERE phone = 'bench-' || (1 + g % 10000)),
+               'Dermatology',
+               repeat('Patient reports skin rash on both arms. ', 10),
+               'Rash, Itching, Redness',
+               '["skin rash", "allergic reaction"]'::json,
+               '["rash", "arms", "itching"]'::json,
+               repeat('10:00 Patient: Hi, I have a rash on my arms. ', 200),
+               'Appointment details pending doctor review.',
+               1 + g % 10, 'NEW',
+               now() - (g || ' seconds')::interval
+        FROM generate_series(1, :rows) g
+    """), {"rows": rows})
+    db.execute(text("""
+        INSERT INTO appointments (client_id, doctor_id, appointment_date, appointment_time, status)
+        SELECT (SELECT id FROM clients WHERE phone = 'bench-' || (1 + g % 10000)),
+               (SELECT id FROM doctors ORDER BY id LIMIT 1 OFFSET g % GREATEST((SELECT count(*) FROM doctors), 1)),
+               to_char(current_date + (g % 365), 'YYYY-MM-DD'),
+               to_char(time '08:00' + ((g % 18) * interval '30 minutes'), 'HH24:MI'),
+               'confirmed'
+        FROM generate_series(1, :rows) g
+    """), {"rows": rows})
+    db.commit()
+    db.execute(text("ANALYZE clients, call_logs, appointments"))
+    db.commit()
+
+
+def run(rows):
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        seed(db, rows)
+
+        print("\n📊 COUNT (pagination)")
+        timed("exact COUNT(*) call_logs", lambda: db.execute(
+            select(func.count(models.CallLog.id))).scalar())
+        timed("pg_class.reltuples estimate (partitions)", lambda: db.execute(
+            text(ESTIMATED_COUNT_SQL), {"table": "call_logs"}).scalar())
+
+        print("\n📊 CALL LOG LIST PAGE (newest first)")
+
+        def default_page():
+            db.expunge_all()
+            logs = db.execute(select(models.CallLog)
+                              .order_by(models.CallLog.created_at.desc())
+                              .limit(PAGE_SIZE)).scalars().all()
+            return [log.client.name for log in logs]  # lazy load per row
+
+        def tuned_page():
+            db.expunge_all()
+            logs = db.execute(select(models.CallLog).options(
+                joinedload(models.CallLog.client),
+                defer(models.CallLog.transcript),
+                defer(models.CallLog.symptoms),
+                defer(models.CallLog.patient_quotes),
+                defer(models.CallLog.extracted_keywords),
+                defer(models.CallLog.ai_action_summary),
+            ).order_by(models.CallLog.created_at.desc())
+             .limit(PAGE_SIZE)).unique().scalars().all()
+            return [log.client.name for log in logs]
+
+        timed("all columns + lazy client (N+1)", default_page)
+        timed("deferred blobs + joined client", tuned_page)
+
+        print("\n📊 APPOINTMENT LIST PAGE")
+
+        def default_appts():
+            db.expunge_all()
+            appts = db.execute(select(models.Appointment)
+                               .order_by(models.Appointment.id.desc())
+                               .limit(PAGE_SIZE)).scalars().all()
+            return [(a.client, a.doctor) for a in appts]
+
+        def tuned_appts():
+            db.expunge_all()
+            appts = db.execute(select(models.Appointment).options(
+                joinedload(models.Appointment.client),
+                joinedload(models.Appointment.doctor),
+            ).order_by(models.Appointment.id.desc())
+             .limit(PAGE_SIZE)).unique().scalars().all()
+            return [(a.client, a.doctor) for a in appts]
+
+        timed("lazy client/doctor (N+1)", default_appts)
+        timed("joined client/doctor", tuned_appts)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    run(parser.parse_args().rows)
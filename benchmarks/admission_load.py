@@ -0,0 +1,66 @@
+"""
+Load check for the tool-call admission controller (admission.py).
+
+Start the API against a deliberately slow DB, then fire a burst of tool calls:
+
+    DB_SLOW_QUERY_MS=1500 uvicorn main:app --port 8000
+    python -m benchmarks.admission_load --url http://localhost:8000 --requests 60
+
+Every request should answer within its route budget (real result or the
+"one moment" / "let me try again" message); the final /health/admission dump shows queue
+depth, shed and deadline counts.
+"""
+import argparse
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from admission import CONTROLLERS
+
+
+def tool_call(base_url, route, args, i):
+    body = json.dumps({
+        "message": {"toolCalls": [{"id": f"load-{i}", "function": {"arguments": args}}]}
+    }).encode()
+    req = urllib.request.Request(f"{base_url}/{route}", data=body,
+                                 headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        result = json.load(resp)["results"][0]["result"]
+    return time.perf_counter() - start, result
+
+
+def run(base_url, total):
+    route = "find_doctors"
+    args = {"specialization": "Cardiologist", "zip_code": "10001"}
+    budget = CONTROLLERS[route].budget_s
+    busy = CONTROLLERS[route].busy_message
+    retry = CONTROLLERS[route].retry_message
+
+    print(f"\n🔥 Firing {total} concurrent /{route} calls (budget {budget:.1f}s)...")
+    with ThreadPoolExecutor(max_workers=total) as pool:
+        outcomes = list(pool.map(lambda i: tool_call(base_url, route, args, i), range(total)))
+
+    latencies = sorted(t for t, _ in outcomes)
+    held = sum(1 for _, r in outcomes if r == busy)
+    turned_away = sum(1 for _, r in outcomes if r == retry)
+    late = sum(1 for t in latencies if t > budget + 0.5)  # allow for HTTP overhead
+
+    print(f"   - answered with results : {total - held - turned_away}")
+    print(f"   - answered 'one moment' : {held}")
+    print(f"   - answered 'try again'  : {turned_away}")
+    print(f"   - p50 / max latency     : {latencies[len(latencies) // 2]:.2f}s / {latencies[-1]:.2f}s")
+    print(f"   - past budget           : {late}")
+
+    with urllib.request.urlopen(f"{base_url}/health/admission") as resp:
+        print("\n📊 /health/admission")
+        print(json.dumps(json.load(resp), indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=60)
+    opts = parser.parse_args()
+    run(opts.url.rstrip("/"), opts.requests)
@@ -0,0 +1,111 @@
+"""
+Benchmark: hundreds of simultaneous bookings racing for a few slots.
+
+Fires --bookings concurrent create_booking() calls (the book_appointment tool
+handler) at --slots slots of one doctor, then checks the appointments table
+for double-bookings and reports throughput.
+
+    python -m benchmarks.booking_contention
+    python -m benchmarks.booking_contention --bookings 500 --slots 3 --workers 14
+
+WARNING: writes to the database in DATABASE_URL (bench rows are cleaned up
+before each run).
+"""
+import argparse
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select
+
+from database import SessionLocal, engine, run_with_session
+from routes.appointments import create_booking
+import models
+
+BENCH_PHONE_PREFIX = "bench-booking-"
+BENCH_DOCTOR = "Dr. Bench Contention"
+
+
+def setup(slots):
+    """Bench doctor available every day, and a date next week to fight over."""
+    db = SessionLocal()
+    try:
+        bench_clients = select(models.Client.id).where(models.Client.phone.like(f"{BENCH_PHONE_PREFIX}%"))
+        db.execute(delete(models.Appointment).where(models.Appointment.client_id.in_(bench_clients)))
+        db.execute(delete(models.Client).where(models.Client.phone.like(f"{BENCH_PHONE_PREFIX}%")))
+
+        doctor = db.execute(select(models.Doctor).where(models.Doctor.name == BENCH_DOCTOR)).scalars().first()
+        if not doctor:
+            day_names = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+            doctor = models.Doctor(
+                name=BENCH_DOCTOR, specialization="General Physician", zipcode="00000",
+                consultation_type="Hybrid", availability={day: "09:00-17:00" for day in day_names},
+            )
+            db.add(doctor)
+        db.commit()
+    finally:
+        db.close()
+
+    day = (datetime.now() + timedelta(days=7)).strftime("%Y-%m-%d")
+    times = [(datetime(2000, 1, 1, 9) + timedelta(minutes=30 * i)).strftime("%H:%M") for i in range(slots)]
+    return day, times
+
+
+def book(i, day, times):
+    args = {
+        "doctor_name": BENCH_DOCTOR,
+        "patient_name": f"Bench Patient {i}",
+        "phone": f"{BENCH_PHONE_PREFIX}{i}",
+        "date": day,
+        "time": times[i % len(times)],
+    }
+    start = time.perf_counter()
+    result = run_with_session(create_booking, args, {})
+    return time.perf_counter() - start, result
+
+
+def run(bookings, slots, workers):
+    models.Base.metadata.create_all(bind=engine)
+    day, times = setup(slots)
+
+    print(f"\n🔥 {bookings} concurrent bookings -> {slots} slots on {day} ({workers} workers)")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(lambda i: book(i, day, times), range(bookings)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(t for t, _ in outcomes)
+    replies = Counter(
+        "booked" if r.startswith("Success") else "slot taken" if "just taken" in r else r
+        for _, r in outcomes
+    )
+
+    db = SessionLocal()
+    try:
+        doctor_id = db.execute(select(models.Doctor.id).where(models.Doctor.name == BENCH_DOCTOR)).scalar()
+        doubles = db.execute(
+            select(models.Appointment.appointment_time, func.count())
+            .where(models.Appointment.doctor_id == doctor_id,
+                   models.Appointment.appointment_date == day,
+                   models.Appointment.status.in_(models.ACTIVE_APPOINTMENT_STATUSES))
+            .group_by(models.Appointment.appointment_time)
+            .having(func.count() > 1)
+        ).all()
+    finally:
+        db.close()
+
+    print(f"   - replies              : {dict(replies)}")
+    print(f"   - throughput           : {bookings / elapsed:.0f} bookings/s ({elapsed:.2f}s total)")
+    print(f"   - p50 / p99 latency    : {latencies[len(latencies) // 2] * 1000:.1f} ms / "
+          f"{latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms")
+    print(f"   - double-booked slots  : {len(doubles)} {'✅' if not doubles else '❌ ' + str(doubles)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bookings", type=int, default=300)
+    parser.add_argument("--slots", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=14, help="keep within the DB pool (15)")
+    opts = parser.parse_args()
+    run(opts.bookings, opts.slots, opts.workers)
@@ -0,0 +1,88 @@
+"""
+Benchmark: /patient_requests serialization at 50k rows.
+
+Compares the old per-request path (map fields, build a PatientRequestDTO per
+row, FastAPI-style encoding) with serving the precomputed dashboard_rows
+payloads (dashboard.py). In-memory only, no database rows are touched.
+
+    python -m benchmarks.dashboard_benchmark
+    python -m benchmarks.dashboard_benchmark --rows 100000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from fastapi.encoders import jsonable_encoder
+
+from dashboard import build_payload, serialize_rows, to_json, urgency_label
+from routes.call_logs import PatientRequestDTO
+
+
+def fake_logs(rows):
+    now = datetime.utcnow()
+    client = SimpleNamespace(name="John Doe", phone="555-0101", zipcode="10001")
+    return [SimpleNamespace(
+        id=i,
+        client=client,
+        created_at=now - timedelta(minutes=i),
+        specialty="Dermatology",
+        symptoms="Rash on arms, Itching, Redness",
+        patient_quotes=["skin rash", "allergic reaction"],
+        extracted_keywords=["rash", "arms", "itching"],
+        summary="Patient reports skin rash on both arms for three days.",
+        ai_action_summary="Appointment details pending doctor review.",
+        status="NEW",
+        urgency_score=i % 10 + 1,
+        transcript="10:00 Patient: Hi, I have a rash on my arms. " * 5,
+    ) for i in range(rows)]
+
+
+def per_request(logs):
+    """What get_patient_requests used to do on every call."""
+    dtos = [PatientRequestDTO(
+        id=str(log.id),
+        patientName=log.client.name if log.client else "Unknown",
+        dateTime=log.created_at,
+        requestedSpecialty=log.specialty or "General",
+        symptoms=[s.strip() for s in log.symptoms.split(',')] if log.symptoms else [],
+        keyPhrases=log.patient_quotes or [],
+        extractedKeywords=log.extracted_keywords or [],
+        aiSummary=log.summary,
+        suggestedAction=log.ai_action_summary or "Review patient details.",
+        status=log.status.lower() if log.status else "new",
+        preferredLocation=log.client.zipcode if log.client else "",
+        contactPhone=log.client.phone if log.client else "",
+        urgencyLevel=urgency_label(log.urgency_score),
+        fullTranscript=log.transcript,
+    ) for log in logs]
+    return json.dumps(jsonable_encoder(dtos))
+
+
+def timed(label, fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"   {label:<45} {best * 1000:9.1f} ms")
+    return result
+
+
+def run(rows):
+    logs = fake_logs(rows)
+    print(f"\n📊 /patient_requests SERIALIZATION ({rows} rows)")
+
+    old_body = timed("per-request DTOs (old)", lambda: per_request(logs))
+    payloads = timed("write-time projection (one-off, at save)", lambda: [to_json(build_payload(log, log.client)) for log in logs])
+    new_body = timed("precomputed rows (new)", lambda: serialize_rows(payloads))
+
+    assert len(json.loads(old_body)) == len(json.loads(new_body)) == rows
+    print(f"   response size: {len(old_body) / 1e6:.1f} MB (old) vs {len(new_body) / 1e6:.1f} MB (new)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50_000)
+    run(parser.parse_args().rows)
@@ -0,0 +1,210 @@
+import argparse
+import asyncio
+import gzip
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, engine
+import models
+import dashboard  # keeps dashboard_rows in sync when transcripts are archived
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip always works
+    zstandard = None
+
+MONTHS_AHEAD = 3
+PARTITION_CHECK_INTERVAL_S = 6 * 60 * 60
+DEFAULT_RETENTION_DAYS = 30
+BATCH_SIZE = 500
+
+# ==========================================
+# 1. MONTHLY PARTITIONS (call_logs by created_at)
+# ==========================================
+def _month_start(dt):
+    return datetime(dt.year, dt.month, 1)
+
+def _next_month(dt):
+    return datetime(dt.year + dt.month // 12, dt.month % 12 + 1, 1)
+
+def ensure_call_log_partitions(bind=engine, start=None, months_ahead=MONTHS_AHEAD):
+    """
+    Creates call_logs_yYYYYmMM partitions from `start` (default: this month)
+    up to `months_ahead` months in the future, plus a DEFAULT catch-all.
+    Rows that already landed in DEFAULT for a month are moved into that
+    month's partition. Safe to run on every startup and on a schedule.
+    """
+    if bind.dialect.name != "postgresql":
+        return
+
+    month = _month_start(start or datetime.utcnow())
+    last = _month_start(datetime.utcnow())
+    for _ in range(months_ahead):
+        last = _next_month(last)
+
+    with bind.begin() as conn:
+        relkind = conn.execute(text(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass('call_logs')"
+        )).scalar()
+        if relkind != "p":
+            print("⚠️  call_logs is not partitioned. Run: python call_log_archive.py --migrate")
+            return
+
+        # Several API workers may start at once; only one maintains partitions
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('call_logs_partitions'))"))
+        conn.execute(text("CREATE TABLE IF NOT EXISTS call_logs_default PARTITION OF call_logs DEFAULT"))
+
+        while month <= last:
+            upper = _next_month(month)
+            name = f"call_logs_y{month:%Y}m{month:%m}"
+            bounds = f"FROM ('{month:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+
+            if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None:
+                # PARTITION OF would fail if DEFAULT already holds rows for this
+                # month, so build the table standalone, move them, then attach
+                conn.execute(text(f"CREATE TABLE {name} (LIKE call_logs INCLUDING DEFAULTS)"))
+                moved = conn.execute(text(
+                    f"WITH moved AS ("
+                    f"  DELETE FROM call_logs_default"
+                    f"  WHERE created_at >= '{month:%Y-%m-%d}' AND created_at < '{upper:%Y-%m-%d}'"
+                    f"  RETURNING *"
+                    f") INSERT INTO {name} SELECT * FROM moved"
+                )).rowcount
+                conn.execute(text(f"ALTER TABLE call_logs ATTACH PARTITION {name} FOR VALUES {bounds}"))
+                if moved:
+                    print(f"   - Moved {moved} call logs from call_logs_default into {name}")
+
+            month = upper
+
+async def partition_maintenance_loop(bind=engine, interval_s=PARTITION_CHECK_INTERVAL_S):
+    """Keeps future partitions in place while the API runs (started from main.py)."""
+    while True:
+        try:
+            await asyncio.to_thread(ensure_call_log_partitions, bind)
+        except Exception as e:
+            print(f"❌ Partition maintenance failed: {e}")
+        await asyncio.sleep(interval_s)
+
+def migrate_call_logs_to_partitioned(bind=engine):
+    """
+    One-off: converts an existing plain call_logs table into the partitioned
+    layout. The old table is kept as call_logs_legacy until dropped by hand.
+    """
+    with bind.begin() as conn:
+        relkind = conn.execute(text(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass('call_logs')"
+        )).scalar()
+        if relkind != "r":
+            print("ℹ️  call_logs is already partitioned (or missing), nothing to migrate.")
+            return
+
+        # Free up the index/sequence names the new table will use
+        conn.execute(text("ALTER TABLE call_logs RENAME TO call_logs_legacy"))
+        for (name,) in conn.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE tablename = 'call_logs_legacy'"
+        )).all():
+            conn.execute(text(f'ALTER INDEX "{name}" RENAME TO "{name}_legacy"'))
+        conn.execute(text("ALTER SEQUENCE IF EXISTS call_logs_id_seq RENAME TO call_logs_legacy_id_seq"))
+
+        models.CallLog.__table__.create(conn)
+        first = conn.execute(text("SELECT min(created_at) FROM call_logs_legacy")).scalar()
+
+    ensure_call_log_partitions(bind, start=first)
+
+    with bind.begin() as conn:
+        cols = ("id, vapi_call_id, specialty, summary, symptoms, patient_quotes, extracted_keywords, "
+                "transcript, ai_action_summary, urgency_score, status, client_id")
+        moved = conn.execute(text(
+            f"INSERT INTO call_logs ({cols}, created_at, transcript_archived) "
+            f"SELECT {cols}, coalesce(created_at, now()), FALSE FROM call_logs_legacy"
+        )).rowcount
+        conn.execute(text("SELECT setval('call_logs_id_seq', coalesce((SELECT max(id) FROM call_logs), 1))"))
+
+    print(f"✅ Moved {moved} call logs into partitioned table. Drop call_logs_legacy when satisfied.")
+
+# ==========================================
+# 2. TRANSCRIPT COMPRESSION
+# ==========================================
+def compress_transcript(transcript):
+    data = transcript.encode("utf-8")
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(data)
+    return "gzip", gzip.compress(data, compresslevel=9)
+
+def decompress_transcript(codec, blob):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Transcript archived with zstd but 'zstandard' is not installed")
+        return zstandard.ZstdDecompressor().decompress(blob).decode("utf-8")
+    return gzip.decompress(blob).decode("utf-8")
+
+def load_transcript(db: Session, log):
+    """Returns the transcript for a call log, restoring it from the archive if needed."""
+    if not log.transcript_archived:
+        return log.transcript
+
+    archive = db.get(models.CallLogArchive, log.id)
+    if not archive:
+        return None
+    return decompress_transcript(archive.codec, archive.transcript)
+
+# ==========================================
+# 3. RETENTION JOB
+# ==========================================
+def archive_old_transcripts(days=DEFAULT_RETENTION_DAYS, batch_size=BATCH_SIZE):
+    """Moves transcripts older than `days` into call_log_archives (compressed)."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    db = SessionLocal()
+    total = 0
+
+    try:
+        while True:
+            stmt = (
+                select(models.CallLog)
+                .where(models.CallLog.created_at < cutoff)
+                .where(models.CallLog.transcript.isnot(None))
+                .where(models.CallLog.transcript_archived.isnot(True))
+                .limit(batch_size)
+            )
+            logs = db.execute(stmt).scalars().all()
+            if not logs:
+                break
+
+            for log in logs:
+                codec, blob = compress_transcript(log.transcript)
+                db.merge(models.CallLogArchive(
+                    call_log_id=log.id,
+                    call_created_at=log.created_at,
+                    codec=codec,
+                    transcript=blob,
+                    original_size=len(log.transcript),
+                ))
+                log.transcript = None
+                log.transcript_archived = True
+
+            db.commit()
+            total += len(logs)
+            print(f"   - Archived {total} transcripts...")
+
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {e}")
+        raise
+    finally:
+        db.close()
+
+    print(f"✅ Archived {total} transcripts older than {days} days.")
+    return total
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="call_logs partition maintenance and transcript archival")
+    parser.add_argument("--days", type=int, default=DEFAULT_RETENTION_DAYS, help="archive transcripts older than this")
+    parser.add_argument("--migrate", action="store_true", help="convert an existing plain call_logs table first")
+    opts = parser.parse_args()
+
+    if opts.migrate:
+        migrate_call_logs_to_partitioned()
+    ensure_call_log_partitions()
+    archive_old_transcripts(days=opts.days)
@@ -0,0 +1,144 @@
+import json
+from sqlalchemy import bindparam, delete, event, inspect, insert, select, update
+from database import engine
+import models
+
+# ==========================================
+# DASHBOARD PROJECTION (/patient_requests)
+# Each call log's dashboard entry is computed once, when the log (or its
+# client) is written, and stored as JSON text in dashboard_rows. Reads just
+# join the stored strings; nothing is recomputed or validated per row.
+# The transcript is left out: it's the heaviest column, call_logs keeps it
+# (partitioned and archived), and /patient_requests/{id} serves it.
+# ==========================================
+
+CLIENT_FIELDS = ("name", "phone", "zipcode")
+
+def urgency_label(score):
+    # Map Urgency Score (1-10) to labels
+    score = score or 5
+    if score >= 8: return 'high'
+    if score >= 5: return 'medium'
+    return 'low'
+
+def client_fields(client):
+    return {
+        "patientName": client.name if client else "Unknown",
+        "preferredLocation": client.zipcode if client else "",
+        "contactPhone": client.phone if client else "",
+    }
+
+def build_payload(log, client):
+    """
+    PatientRequestDTO as a plain dict. `log`/`client` can be ORM objects or
+    Core rows (same attribute names); `client` may be None.
+    """
+    return {
+        "id": str(log.id),
+        "dateTime": log.created_at.isoformat() if log.created_at else None,
+        "requestedSpecialty": log.specialty or "General",
+        # Helper to safely parse symptoms string into a list
+        "symptoms": [s.strip() for s in log.symptoms.split(',')] if log.symptoms else [],
+
+        # These JSON lists come directly from the DB
+        "keyPhrases": log.patient_quotes or [],
+        "extractedKeywords": log.extracted_keywords or [],
+
+        "aiSummary": log.summary,
+        "suggestedAction": log.ai_action_summary or "Review patient details.",
+        "status": log.status.lower() if log.status else "new",
+        "urgencyLevel": urgency_label(log.urgency_score),
+        **client_fields(client),
+    }
+
+def to_json(payload):
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+def serialize_rows(payloads):
+    """Stored payloads are already JSON, so the list response is a plain join."""
+    return "[" + ",".join(payloads) + "]"
+
+# ==========================================
+# WRITE-TIME REFRESH (ORM events)
+# Runs inside the same flush/transaction as the change itself, so admin
+# edits and the archival job keep the projection current too.
+# ==========================================
+rows_table = models.DashboardRow.__table__
+logs_table = models.CallLog.__table__
+clients_table = models.Client.__table__
+# Everything build_payload needs, without reading the transcript
+log_columns = [c for c in logs_table.c if c.name != "transcript"]
+
+def refresh_dashboard_row(connection, call_log_id):
+    log = connection.execute(select(*log_columns).where(logs_table.c.id == call_log_id)).first()
+    if log is None:
+        return
+    client = connection.execute(select(clients_table).where(clients_table.c.id == log.client_id)).first()
+
+    values = {
+        "client_id": log.client_id,
+        "created_at": log.created_at,
+        "payload": to_json(build_payload(log, client)),
+    }
+    updated = connection.execute(
+        update(rows_table).where(rows_table.c.call_log_id == call_log_id).values(**values)
+    ).rowcount
+    if not updated:
+        connection.execute(insert(rows_table).values(call_log_id=call_log_id, **values))
+
+@event.listens_for(models.CallLog, "after_insert")
+@event.listens_for(models.CallLog, "after_update")
+def _call_log_written(mapper, connection, target):
+    refresh_dashboard_row(connection, target.id)
+
+@event.listens_for(models.CallLog, "after_delete")
+def _call_log_deleted(mapper, connection, target):
+    connection.execute(delete(rows_table).where(rows_table.c.call_log_id == target.id))
+
+@event.listens_for(models.Client, "after_update")
+def _client_written(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[field].history.has_changes() for field in CLIENT_FIELDS):
+        return
+
+    # Patch only the client fields; the rest of each payload is unchanged
+    fields = client_fields(target)
+    rows = connection.execute(
+        select(rows_table.c.call_log_id, rows_table.c.payload).where(rows_table.c.client_id == target.id)
+    ).all()
+    if not rows:
+        return
+
+    connection.execute(
+        update(rows_table)
+        .where(rows_table.c.call_log_id == bindparam("row_id"))
+        .values(payload=bindparam("new_payload")),
+        [{"row_id": row.call_log_id, "new_payload": to_json({**json.loads(row.payload), **fields})} for row in rows]
+    )
+
+# ==========================================
+# BACKFILL
+# ==========================================
+def rebuild_dashboard_rows(batch_size=1000):
+    """Recomputes every dashboard row from call_logs (one-off / after schema changes)."""
+    total = 0
+    with engine.begin() as conn:
+        conn.execute(delete(rows_table))
+        stmt = (
+            select(*log_columns, clients_table.c.name, clients_table.c.phone, clients_table.c.zipcode)
+            .outerjoin(clients_table, clients_table.c.id == logs_table.c.client_id)
+            .execution_options(yield_per=batch_size)
+        )
+        for batch in conn.execute(stmt).partitions():
+            conn.execute(insert(rows_table), [{
+                "call_log_id": row.id,
+                "client_id": row.client_id,
+                "created_at": row.created_at,
+                "payload": to_json(build_payload(row, row)),  # row carries the client columns too
+            } for row in batch])
+            total += len(batch)
+    print(f"✅ Rebuilt {total} dashboard rows.")
+    return total
+
+if __name__ == "__main__":
+    rebuild_dashboard_rows()
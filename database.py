@@ -1,5 +1,6 @@
 import os
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 
@@ -15,6 +16,15 @@ engine = create_engine(
     pool_pre_ping=True
 )
 
+# Local testing only: DB_SLOW_QUERY_MS=1500 delays every query to simulate
+# a struggling database (see admission.py)
+SLOW_QUERY_MS = int(os.getenv("DB_SLOW_QUERY_MS", "0"))
+
+if SLOW_QUERY_MS:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _slow_down(conn, cursor, statement, parameters, context, executemany):
+        time.sleep(SLOW_QUERY_MS / 1000)
+
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
@@ -30,3 +40,11 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Same as get_db, for work running outside a request (e.g. worker threads)
+def run_with_session(fn, *args):
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
@@ -1,13 +1,32 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from database import engine
 import models
 from admin_panel import setup_admin
+from call_log_archive import partition_maintenance_loop
+from tool_calls import tool_call_results_cleanup_loop
 from fastapi.middleware.cors import CORSMiddleware
 
+# ==========================================
+# BACKGROUND MAINTENANCE
+# ==========================================
+@asynccontextmanager
+async def lifespan(app):
+    # Creates upcoming call_logs partitions now and every few hours after,
+    # and drops old idempotency records for tool calls
+    maintenance = [
+        asyncio.create_task(partition_maintenance_loop(engine)),
+        asyncio.create_task(tool_call_results_cleanup_loop()),
+    ]
+    yield
+    for task in maintenance:
+        task.cancel()
+
 # ==========================================
 # CREATE APP (ONLY ONCE)
 # ==========================================
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # ==========================================
 # CORS
@@ -23,7 +42,7 @@ app.add_middleware(
 # ==========================================
 # IMPORT ROUTERS
 # ==========================================
-from routes import doctors, appointments, call_logs, health
+from routes import doctors, appointments, call_logs, health, tools
 
 # ==========================================
 # DATABASE
@@ -41,4 +60,5 @@ setup_admin(app, engine)
 app.include_router(doctors.router)
 app.include_router(appointments.router)
 app.include_router(call_logs.router)
+app.include_router(tools.router)
 app.include_router(health.router)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, JSON, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, Boolean, JSON, ForeignKey, DateTime, LargeBinary, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -69,6 +69,9 @@ class Doctor(Base):
 # =========================
 # 5. APPOINTMENTS
 # =========================
+# Statuses that occupy a doctor's slot (e.g. "completed"/"cancelled" don't)
+ACTIVE_APPOINTMENT_STATUSES = ("booked", "confirmed")
+
 class Appointment(Base):
     __tablename__ = "appointments"
     id = Column(Integer, primary_key=True, index=True)
@@ -77,7 +80,7 @@ class Appointment(Base):
     doctor_id = Column(Integer, ForeignKey("doctors.id"))
 
     # NOTE: Changed Date/Time to String to prevent AI formatting errors
-    appointment_date = Column(String(50)) 
+    appointment_date = Column(String(50), index=True)
     appointment_time = Column(String(50))
     
     status = Column(String(20), default="booked")
@@ -86,14 +89,30 @@ class Appointment(Base):
     client = relationship("Client", back_populates="appointments")
     doctor = relationship("Doctor", back_populates="appointments")
 
+    __table_args__ = (
+        # Last line of defence against double-booking (see routes/appointments.py).
+        # Exact match only: rows booked before the 30-minute grid (e.g. "10:15")
+        # aren't compared with on-grid slots, so move or cancel those by hand
+        # when creating this index on an existing database.
+        Index(
+            "uq_appointments_active_slot",
+            doctor_id, appointment_date, appointment_time,
+            unique=True,
+            postgresql_where=status.in_(ACTIVE_APPOINTMENT_STATUSES),
+        ),
+    )
+
 # =========================
 # 6. CALL LOGS
 # =========================
 class CallLog(Base):
     __tablename__ = "call_logs"
+    # Monthly partitions are created by call_log_archive.ensure_call_log_partitions()
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
-    id = Column(Integer, primary_key=True, index=True)
-    vapi_call_id = Column(String, unique=True, index=True)
+    # Postgres requires the partition key in every PK/unique constraint
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    vapi_call_id = Column(String, index=True)
     
     # --- Dashboard Fields ---
     specialty = Column(String(100))        # "Dermatology"
@@ -111,8 +130,58 @@ class CallLog(Base):
     urgency_score = Column(Integer, default=5) 
     status = Column(String(50), default="NEW") # "NEW", "REVIEWED"
     
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow, index=True)
+
+    # Transcript moved to call_log_archives (compressed) by the retention job
+    transcript_archived = Column(Boolean, default=False)
 
     # Link to Patient
     client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
-    client = relationship("Client", back_populates="call_logs")
\ No newline at end of file
+    client = relationship("Client", back_populates="call_logs")
+
+    # DB primary key is (id, created_at); ids are still unique, so the ORM
+    # (and sqladmin URLs) identify rows by id alone
+    __mapper_args__ = {"primary_key": [id]}
+
+# =========================
+# 7. CALL LOG ARCHIVE
+# =========================
+class CallLogArchive(Base):
+    __tablename__ = "call_log_archives"
+
+    # No FK: old call_logs partitions may be detached/dropped independently
+    call_log_id = Column(Integer, primary_key=True, autoincrement=False)
+    call_created_at = Column(DateTime, nullable=False)
+
+    codec = Column(String(10), nullable=False)  # "zstd" | "gzip"
+    transcript = Column(LargeBinary, nullable=False)
+    original_size = Column(Integer)
+
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# =========================
+# 8. DASHBOARD PROJECTION
+# =========================
+class DashboardRow(Base):
+    __tablename__ = "dashboard_rows"
+
+    # One ready-to-serve /patient_requests entry per call log (see dashboard.py)
+    call_log_id = Column(Integer, primary_key=True, autoincrement=False)
+    client_id = Column(Integer, index=True)
+    created_at = Column(DateTime, index=True)
+
+    payload = Column(Text, nullable=False)  # PatientRequestDTO as JSON text
+
+# =========================
+# 9. TOOL CALL RESULTS (Idempotent webhooks)
+# =========================
+class ToolCallResult(Base):
+    __tablename__ = "tool_call_results"
+
+    # Vapi retries re-send the same toolCallId; the stored outcome is replayed
+    tool_call_id = Column(String(100), primary_key=True)
+    tool_name = Column(String(50))
+    status = Column(String(20), default="running")  # "running" | "done"
+    result = Column(Text)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -1,76 +1,208 @@
-from fastapi import APIRouter, Depends, Body
+from fastapi import APIRouter, Body
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy import select, text
+from sqlalchemy.exc import IntegrityError
+from tool_calls import register_tool, dispatch
 import models
-import json
 import dateparser
-from datetime import datetime
+from datetime import datetime, timedelta
 
 router = APIRouter()
 
-@router.post("/book_appointment")
-async def book_appointment(payload: dict = Body(...), db: Session = Depends(get_db)):
-    print(f"\n{'='*50}")
-    print(f"📅 BOOKING REQUEST")
-    
+SLOT_MINUTES = 30
+MAX_ALTERNATIVES = 3
+LOOKAHEAD_DAYS = 7
+
+# ==========================================
+# SLOT HELPERS (Concurrency-safe booking)
+# ==========================================
+def lock_doctor_day(db: Session, doctor_id: int, date_str: str):
+    """
+    Transaction-scoped advisory lock on (doctor, day): concurrent bookings for
+    the same doctor and day queue here for a few ms instead of racing.
+    Released automatically on commit/rollback.
+    """
+    if db.bind.dialect.name == "postgresql":
+        db.execute(
+            text("SELECT pg_advisory_xact_lock(:doctor_id, hashtext(:day))"),
+            {"doctor_id": doctor_id, "day": date_str}
+        )
+
+def slot_holder(db: Session, doctor_id: int, date_str: str, time_str: str):
+    """client_id of the active appointment in this slot, or None if it's free."""
+    stmt = select(models.Appointment.client_id).where(
+        models.Appointment.doctor_id == doctor_id,
+        models.Appointment.appointment_date == date_str,
+        models.Appointment.appointment_time == time_str,
+        models.Appointment.status.in_(models.ACTIVE_APPOINTMENT_STATUSES),
+    ).limit(1)
+    return db.execute(stmt).scalar()
+
+def parse_requested_slot(raw_date, raw_time):
+    """
+    Combine "next Wednesday" + "4 PM" -> 2025-11-12 16:00. Returns None when
+    the time (or the date) can't be understood, so we ask instead of guessing.
+    """
+    settings = {'PREFER_DATES_FROM': 'future', 'RELATIVE_BASE': datetime.now()}
+
+    raw_time = str(raw_time or "").strip()
+    time_part = dateparser.parse(raw_time, settings=settings) if raw_time else None
+    if not time_part:
+        return None
+
+    parsed = dateparser.parse(f"{raw_date} {raw_time}", settings=settings)
+    if not parsed:
+        day = dateparser.parse(str(raw_date or "today"), settings=settings)
+        if not day:
+            return None
+        parsed = datetime.combine(day.date(), time_part.time())
+    return parsed
+
+def slot_start(requested: datetime) -> datetime:
+    """Start of the SLOT_MINUTES slot containing `requested` (10:15 -> 10:00, 10:45 -> 10:30)."""
+    requested = requested.replace(second=0, microsecond=0)
+    return requested - timedelta(minutes=requested.minute % SLOT_MINUTES)
+
+def neighbouring_slots(requested: datetime):
+    """The grid slots either side of an off-grid time (10:15 -> 10:00, 10:30)."""
+    start = slot_start(requested)
+    return [start, start + timedelta(minutes=SLOT_MINUTES)]
+
+def availability_window(doctor, date: datetime):
+    """(start, end) of the doctor's hours on that day, from {"Monday": "09:00-17:00"}; None if off."""
+    hours = (doctor.availability or {}).get(date.strftime("%A"))
+    if not hours:
+        return None
+    day = date.strftime("%Y-%m-%d")
     try:
-        # 1. Parse Vapi Payload
-        tool_call_id = None
-        args = {}
-        if "message" in payload and "toolCalls" in payload["message"]:
-            tool_call = payload["message"]["toolCalls"][0]
-            tool_call_id = tool_call["id"]
-            raw_args = tool_call["function"]["arguments"]
-            args = json.loads(raw_args) if isinstance(raw_args, str) else raw_args
-        
-        print(f"📥 RAW ARGS: {args}")
+        start, end = [datetime.strptime(f"{day} {h.strip()}", "%Y-%m-%d %H:%M") for h in hours.split("-")]
+    except ValueError:
+        return None
+    return start, end
+
+def is_bookable(doctor, slot: datetime) -> bool:
+    if slot <= datetime.now():
+        return False
+    if not doctor.availability:
+        return True # No schedule on file ("Standard Business Hours")
+    window = availability_window(doctor, slot)
+    return bool(window) and window[0] <= slot and slot + timedelta(minutes=SLOT_MINUTES) <= window[1]
+
+def find_open_slots(db: Session, doctor, requested: datetime, limit=MAX_ALTERNATIVES):
+    """
+    Free slots from the doctor's availability ({"Monday": "09:00-17:00"}),
+    closest to the requested time on that day first, then the following days.
+    """
+    slots = []
+    for offset in range(LOOKAHEAD_DAYS):
+        date = requested + timedelta(days=offset)
+        day = date.strftime("%Y-%m-%d")
+        window = availability_window(doctor, date)
+        if not window:
+            continue
+        start, end = window
+
+        taken = set(db.execute(select(models.Appointment.appointment_time).where(
+            models.Appointment.doctor_id == doctor.id,
+            models.Appointment.appointment_date == day,
+            models.Appointment.status.in_(models.ACTIVE_APPOINTMENT_STATUSES),
+        )).scalars())
+
+        day_slots = []
+        slot = start
+        while slot + timedelta(minutes=SLOT_MINUTES) <= end:
+            if slot > datetime.now() and slot.strftime("%H:%M") not in taken:
+                day_slots.append(slot)
+            slot += timedelta(minutes=SLOT_MINUTES)
+
+        if offset == 0:
+            day_slots.sort(key=lambda s: abs(s - requested))
+
+        slots.extend(day_slots[:limit - len(slots)])
+        if len(slots) >= limit:
+            break
+
+    return slots
+
+def alternatives_reply(db: Session, doctor, requested: datetime, reason: str, alternatives=None) -> str:
+    if alternatives is None:
+        alternatives = find_open_slots(db, doctor, requested)
+    if not alternatives:
+        return (f"I'm sorry, {reason} and I don't see other openings with Dr. {doctor.name} "
+                f"in the next week. Would you like to try a different doctor?")
+
+    options = ", or ".join(s.strftime("%A, %B %d at %I:%M %p") for s in alternatives)
+    return f"I'm sorry, {reason}. I can offer {options}. Which would you prefer?"
+
+def slot_taken_reply(db: Session, doctor, requested: datetime) -> str:
+    return alternatives_reply(db, doctor, requested, f"that time with Dr. {doctor.name} was just taken")
+
+def off_grid_reply(db: Session, doctor, requested: datetime) -> str:
+    """Let the caller pick a grid slot instead of silently moving their time."""
+    reason = f"appointments start on the hour or half hour, so I can't book {requested.strftime('%I:%M %p')}"
+    if doctor.availability:
+        # Open slots nearest the requested time come first, i.e. the neighbours
+        return alternatives_reply(db, doctor, requested, reason)
 
+    # No schedule on file: offer the free slots either side
+    neighbours = [
+        slot for slot in neighbouring_slots(requested)
+        if is_bookable(doctor, slot)
+        and slot_holder(db, doctor.id, slot.strftime("%Y-%m-%d"), slot.strftime("%H:%M")) is None
+    ]
+    return alternatives_reply(db, doctor, requested, reason, alternatives=neighbours)
+
+def create_booking(db: Session, args: dict, message: dict) -> str:
+    print(f"📥 RAW ARGS: {args}")
+
+    try:
         # 2. Extract Data
         # Doctor Name Matching Strategy: Split name to find matches (e.g. "Lee" matches "Sarah Lee")
         doc_input = args.get("doctor_name", "").strip().replace("Dr.", "").strip()
-        
+
         patient_name = args.get("patient_name", "Unknown").strip()
         phone = args.get("phone", "").strip()
-        
+
         raw_date = args.get("date", "today")
         raw_time = args.get("time", "")
 
         # 3. DATE & TIME PROCESSING (The Fix)
-        # Combine "next Wednesday" + "4 PM" -> "2025-11-12 16:00:00"
-        dt_string = f"{raw_date} {raw_time}"
-        parsed_dt = dateparser.parse(dt_string, settings={'PREFER_DATES_FROM': 'future', 'RELATIVE_BASE': datetime.now()})
-        
-        if parsed_dt:
-            final_date_str = parsed_dt.strftime("%Y-%m-%d") # Database Standard: 2025-11-12
-            final_time_str = parsed_dt.strftime("%H:%M")     # Database Standard: 16:00
-            
-            # Nice format for the voice agent to say back
-            voice_confirm_date = parsed_dt.strftime("%A, %B %d") 
-            voice_confirm_time = parsed_dt.strftime("%I:%M %p")
-        else:
-            # Fallback (Safety net)
-            final_date_str = datetime.now().strftime("%Y-%m-%d")
-            final_time_str = raw_time
-            voice_confirm_date = raw_date
-            voice_confirm_time = raw_time
+        parsed_dt = parse_requested_slot(raw_date, raw_time)
+        if not parsed_dt:
+            return ("I'm sorry, I didn't catch the date and time for the appointment. "
+                    "Could you tell me again, for example Monday at 10 AM?")
+
+        parsed_dt = parsed_dt.replace(second=0, microsecond=0)
+
+        final_date_str = parsed_dt.strftime("%Y-%m-%d") # Database Standard: 2025-11-12
+        final_time_str = parsed_dt.strftime("%H:%M")     # Database Standard: 16:00
+
+        # Nice format for the voice agent to say back
+        voice_confirm_date = parsed_dt.strftime("%A, %B %d")
+        voice_confirm_time = parsed_dt.strftime("%I:%M %p")
 
         # 4. Find Doctor (Improved Logic)
         # We try to match the last name if full name fails
         doctor = db.query(models.Doctor).filter(models.Doctor.name.ilike(f"%{doc_input}%")).first()
-        
+
         if not doctor:
             # Try searching just by last word (e.g. user said "Lee", DB has "Sarah Lee")
             last_name = doc_input.split()[-1]
             doctor = db.query(models.Doctor).filter(models.Doctor.name.ilike(f"%{last_name}%")).first()
 
         if not doctor:
-            return JSONResponse(content={
-                "results": [{
-                    "toolCallId": tool_call_id,
-                    "result": f"I couldn't find a doctor named {doc_input}. Please confirm the doctor's full name."
-                }]
-            })
+            return f"I couldn't find a doctor named {doc_input}. Please confirm the doctor's full name."
+
+        # Bookings live on the SLOT_MINUTES grid so 10:00 and 10:15 can't overlap
+        if parsed_dt != slot_start(parsed_dt):
+            return off_grid_reply(db, doctor, parsed_dt)
+
+        if not is_bookable(doctor, parsed_dt):
+            return alternatives_reply(
+                db, doctor, parsed_dt,
+                f"Dr. {doctor.name} isn't available on {voice_confirm_date} at {voice_confirm_time}"
+            )
 
         # 5. Handle Client (Create or Find)
         client = db.query(models.Client).filter(models.Client.phone == phone).first()
@@ -80,7 +212,23 @@ async def book_appointment(payload: dict = Body(...), db: Session = Depends(get_
             db.commit()
             db.refresh(client)
 
-        # 6. Create Appointment
+        confirmation = f"Success. I have confirmed your appointment with Dr. {doctor.name} for {voice_confirm_date} at {voice_confirm_time}."
+
+        # 6. Create Appointment (one booking per doctor-day at a time)
+        lock_doctor_day(db, doctor.id, final_date_str)
+
+        holder = slot_holder(db, doctor.id, final_date_str, final_time_str)
+        if holder is not None and holder == client.id:
+            # Same caller again (retry / re-invoked tool): it's already theirs
+            db.rollback() # Releases the lock
+            print(f"🔁 ALREADY BOOKED: Dr. {doctor.name} | {final_date_str} @ {final_time_str}")
+            return confirmation
+
+        if holder is not None:
+            db.rollback() # Releases the lock
+            print(f"⛔ SLOT TAKEN: Dr. {doctor.name} | {final_date_str} @ {final_time_str}")
+            return slot_taken_reply(db, doctor, parsed_dt)
+
         new_appt = models.Appointment(
             client_id=client.id,
             doctor_id=doctor.id,
@@ -89,17 +237,30 @@ async def book_appointment(payload: dict = Body(...), db: Session = Depends(get_
             status="confirmed"
         )
         db.add(new_appt)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            # Unique slot index caught a race the lock didn't cover (e.g. admin edit)
+            db.rollback()
+            if slot_holder(db, doctor.id, final_date_str, final_time_str) == client.id:
+                return confirmation
+            print(f"⛔ SLOT TAKEN (constraint): Dr. {doctor.name} | {final_date_str} @ {final_time_str}")
+            return slot_taken_reply(db, doctor, parsed_dt)
 
         print(f"✅ BOOKED: Dr. {doctor.name} | {final_date_str} @ {final_time_str}")
 
-        return JSONResponse(content={
-            "results": [{
-                "toolCallId": tool_call_id,
-                "result": f"Success. I have confirmed your appointment with Dr. {doctor.name} for {voice_confirm_date} at {voice_confirm_time}."
-            }]
-        })
+        return confirmation
 
     except Exception as e:
         print(f"❌ ERROR: {e}")
-        return JSONResponse(content={"results": [{"toolCallId": tool_call_id, "result": "System error booking appointment."}]})
\ No newline at end of file
+        return "System error booking appointment."
+
+register_tool("book_appointment", create_booking, writes=True,
+              error_message="System error booking appointment.")
+
+@router.post("/book_appointment")
+async def book_appointment(payload: dict = Body(...)):
+    print(f"\n{'='*50}")
+    print(f"📅 BOOKING REQUEST")
+
+    return JSONResponse(content=await dispatch(payload, default="book_appointment"))
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Body, Depends
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import select, desc
+from sqlalchemy import select, desc, text
 from database import get_db
+from tool_calls import register_tool, dispatch
 import models
-import json
 from typing import List, Optional
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, timedelta
+from call_log_archive import load_transcript
+from dashboard import build_payload, serialize_rows
 
 router = APIRouter()
 
@@ -28,89 +30,59 @@ class PatientRequestDTO(BaseModel):
     preferredLocation: Optional[str]
     contactPhone: Optional[str]
     urgencyLevel: str              # 'low' | 'medium' | 'high'
-    fullTranscript: Optional[str]  # The full text block
-
-    class Config:
-        orm_mode = True
+    fullTranscript: Optional[str] = None  # The full text block (detail endpoint only)
 
 # ==========================================
-# 2. GET ENDPOINT (For Angular Dashboard)
+# 2. GET ENDPOINTS (For Angular Dashboard)
 # ==========================================
 @router.get("/patient_requests", response_model=List[PatientRequestDTO])
-def get_patient_requests(db: Session = Depends(get_db)):
+def get_patient_requests(
+    days: Optional[int] = Query(None, ge=1, description="Only logs from the last N days"),
+    db: Session = Depends(get_db)
+):
+    """
+    Serves the precomputed dashboard rows (see dashboard.py), newest first.
+    Transcripts aren't included; use /patient_requests/{id} for those.
+    """
+    stmt = select(models.DashboardRow.payload)
+
+    if days:
+        stmt = stmt.where(models.DashboardRow.created_at >= datetime.utcnow() - timedelta(days=days))
+
+    payloads = db.execute(stmt.order_by(desc(models.DashboardRow.created_at))).scalars().all()
+
+    # Rows are stored as JSON already: no per-row model construction
+    return Response(content=serialize_rows(payloads), media_type="application/json")
+
+@router.get("/patient_requests/{log_id}", response_model=PatientRequestDTO)
+def get_patient_request(log_id: int, db: Session = Depends(get_db)):
     """
-    Fetches call logs, formats them, and sends them to the frontend.
+    Single call log, with the transcript restored from the archive if needed.
     """
-    # Fetch logs (newest first) and join with Client table
-    logs = db.query(models.CallLog)\
+    log = db.query(models.CallLog)\
         .options(joinedload(models.CallLog.client))\
-        .order_by(desc(models.CallLog.created_at))\
-        .all()
-
-    response_data = []
-
-    for log in logs:
-        # Map Urgency Score (1-10) to labels
-        score = log.urgency_score or 5
-        if score >= 8: urgency = 'high'
-        elif score >= 5: urgency = 'medium'
-        else: urgency = 'low'
-
-        # Helper to safely parse symptoms string into a list
-        symptoms_list = [s.strip() for s in (log.symptoms or "").split(',')] if log.symptoms else []
-
-        # Create the data object for the frontend
-        dto = PatientRequestDTO(
-            id=str(log.id),
-            patientName=log.client.name if log.client else "Unknown",
-            dateTime=log.created_at,
-            requestedSpecialty=log.specialty or "General",
-            symptoms=symptoms_list,
-            
-            # These JSON lists come directly from the DB
-            keyPhrases=log.patient_quotes or [],
-            extractedKeywords=log.extracted_keywords or [],
-            
-            aiSummary=log.summary,
-            suggestedAction=log.ai_action_summary or "Review patient details.",
-            status=log.status.lower() if log.status else "new",
-            preferredLocation=log.client.zipcode if log.client else "",
-            contactPhone=log.client.phone if log.client else "",
-            urgencyLevel=urgency,
-            fullTranscript=log.transcript
-        )
-        response_data.append(dto)
-
-    return response_data
+        .filter(models.CallLog.id == log_id)\
+        .first()
+
+    if not log:
+        raise HTTPException(status_code=404, detail="Call log not found")
+
+    payload = build_payload(log, log.client)
+    payload["fullTranscript"] = load_transcript(db, log)
+    return payload
 
 # ==========================================
 # 3. POST ENDPOINT (Save Data from Vapi)
 # ==========================================
-@router.post("/save_call_log")
-async def save_call_details(payload: dict = Body(...), db: Session = Depends(get_db)):
-    print(f"\n{'='*50}")
-    print("📝 SAVING RICH CALL DATA...")
-
+def store_call_details(db: Session, args: dict, message: dict) -> str:
     try:
-        # 1. Parse Tool Arguments
-        tool_calls = payload.get("message", {}).get("toolCalls", [])
-        if not tool_calls:
-            return {"results": [{"result": "Error: No data received."}]}
-
-        tool_call = tool_calls[0]
-        args = tool_call.get("function", {}).get("arguments", {})
-        
-        # Handle JSON string parsing if needed
-        if isinstance(args, str):
-            args = json.loads(args)
-
         print(f"📥 Received for: {args.get('patient_name')}")
 
         # 2. Find or Create Client
         phone = args.get("patient_phone")
         # Fallback to caller ID if tool didn't send phone
         if not phone:
-            phone = payload.get("message", {}).get("customer", {}).get("number", "Unknown")
+            phone = message.get("customer", {}).get("number", "Unknown")
 
         stmt = select(models.Client).where(models.Client.phone == phone)
         client = db.execute(stmt).scalars().first()
@@ -129,40 +101,51 @@ async def save_call_details(payload: dict = Body(...), db: Session = Depends(get
             if args.get("location"): client.zipcode = args.get("location")
             db.commit()
 
-        # 3. Create Rich Call Log
-        new_log = models.CallLog(
-            vapi_call_id=payload.get("message", {}).get("call", {}).get("id"),
-            client_id=client.id,
-            
-            # Text Fields
-            specialty=args.get("specialty"),
-            summary=args.get("summary"),
-            symptoms=args.get("symptoms"),
-            transcript=args.get("transcript_summary"), # Storing the summary of transcript provided by AI
-            ai_action_summary="Appointment details pending doctor review.", 
-            
-            # JSON Fields (Lists)
-            patient_quotes=args.get("quotes", []),     # List of strings
-            extracted_keywords=args.get("keywords", []), # List of strings
-            
-            urgency_score=args.get("urgency", 5),
-            status="NEW"
-        )
-
-        db.add(new_log)
+        # 3. Create (or update) Rich Call Log -- one per Vapi call, so a
+        # re-invoked tool updates the existing log instead of adding another
+        vapi_call_id = message.get("call", {}).get("id")
+        new_log = None
+        if vapi_call_id:
+            db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:call_id))"), {"call_id": vapi_call_id})
+            new_log = db.execute(
+                select(models.CallLog).where(models.CallLog.vapi_call_id == vapi_call_id)
+            ).scalars().first()
+
+        if not new_log:
+            new_log = models.CallLog(vapi_call_id=vapi_call_id, status="NEW")
+            db.add(new_log)
+
+        new_log.client_id = client.id
+
+        # Text Fields
+        new_log.specialty = args.get("specialty")
+        new_log.summary = args.get("summary")
+        new_log.symptoms = args.get("symptoms")
+        new_log.transcript = args.get("transcript_summary") # Storing the summary of transcript provided by AI
+        new_log.ai_action_summary = "Appointment details pending doctor review."
+
+        # JSON Fields (Lists)
+        new_log.patient_quotes = args.get("quotes", [])     # List of strings
+        new_log.extracted_keywords = args.get("keywords", []) # List of strings
+
+        new_log.urgency_score = args.get("urgency", 5)
+
         db.commit()
 
         print(f"✅ SAVED PROFILE: {client.name} | {new_log.specialty}")
 
-        return {
-            "results": [
-                {
-                    "toolCallId": tool_call.get("id"),
-                    "result": "Patient profile and summary saved successfully."
-                }
-            ]
-        }
+        return "Patient profile and summary saved successfully."
 
     except Exception as e:
         print(f"❌ ERROR: {e}")
-        return {"results": [{"result": "System error saving profile."}]}
\ No newline at end of file
+        return "System error saving profile."
+
+register_tool("save_call_log", store_call_details, writes=True,
+              error_message="System error saving profile.")
+
+@router.post("/save_call_log")
+async def save_call_details(payload: dict = Body(...)):
+    print(f"\n{'='*50}")
+    print("📝 SAVING RICH CALL DATA...")
+
+    return await dispatch(payload, default="save_call_log")
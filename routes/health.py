@@ -1,4 +1,5 @@
 from fastapi import APIRouter
+from admission import admission_stats
 
 router = APIRouter()
 
@@ -8,3 +9,10 @@ router = APIRouter()
 @router.get("/health")
 async def health():
     return {"status": "healthy", "service": "careconnect-api"}
+
+# ==========================================
+# 5. ADMISSION STATS (queue depth / shed counts per tool route)
+# ==========================================
+@router.get("/health/admission")
+async def admission():
+    return admission_stats()
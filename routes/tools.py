@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Body
+from fastapi.responses import JSONResponse
+from tool_calls import dispatch, TOOLS
+from routes import doctors, appointments, call_logs  # registers their tools
+
+router = APIRouter()
+
+# ==========================================
+# UNIFIED VAPI WEBHOOK (any number of toolCalls)
+# ==========================================
+@router.post("/tool_calls")
+async def tool_calls(payload: dict = Body(...)):
+    names = [tc.get("function", {}).get("name") for tc in payload.get("message", {}).get("toolCalls", [])]
+    print(f"\n{'='*50}")
+    print(f"🧰 TOOL CALLS: {names} (registered: {list(TOOLS)})")
+
+    return JSONResponse(content=await dispatch(payload))
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from database import SessionLocal, engine
 import models
 from sqlalchemy import text  # <--- Import this
+from call_log_archive import ensure_call_log_partitions
 
 def reset_database():
     db = SessionLocal()
@@ -10,7 +11,7 @@ def reset_database():
     try:
         # TRUNCATE removes all data and RESTART IDENTITY resets IDs to 1
         # CASCADE ensures child tables (like appointments) are cleared too
-        db.execute(text("TRUNCATE TABLE appointments, call_logs, doctors, clients, users, roles RESTART IDENTITY CASCADE;"))
+        db.execute(text("TRUNCATE TABLE appointments, call_logs, call_log_archives, dashboard_rows, tool_call_results, doctors, clients, users, roles RESTART IDENTITY CASCADE;"))
         db.commit()
         print("✅ Tables truncated and IDs reset to 1.")
         
@@ -149,5 +150,6 @@ def seed_data():
 
 if __name__ == "__main__":
     models.Base.metadata.create_all(bind=engine)
+    ensure_call_log_partitions(engine)
     reset_database()
     seed_data()
\ No newline at end of file
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from admission import admit, CONTROLLERS
+from database import SessionLocal, run_with_session
+import models
+
+# ==========================================
+# VAPI TOOL-CALL DISPATCHER
+# One Vapi message can carry several toolCalls. Each registered tool is a
+# blocking handler(db, args, message) -> str that runs under its route's
+# admission controller; results come back keyed by toolCallId.
+# ==========================================
+
+MAX_PARALLEL_TOOL_CALLS = 4
+
+# Idempotent write tools (see run_recorded)
+RESULT_POLL_S = 0.25
+STALE_CLAIM_AFTER = timedelta(minutes=5)  # a "running" claim older than this was abandoned
+KEEP_RESULTS_FOR = timedelta(days=1)
+
+TOOLS = {}
+
+def register_tool(name, handler, writes=False, error_message="System Error."):
+    """
+    `name` is the Vapi function name and must match a controller in admission.py.
+    `handler(db, args, message)` runs in a worker thread with its own session
+    and returns the text the AI reads out; dispatch() answers every toolCall
+    in the message, keyed by toolCallId.
+    Tools that write (`writes=True`) run one at a time, in message order, so two
+    calls in the same message can't race on e.g. creating the same client.
+    Writes are also recorded by toolCallId, so a retried call replays the
+    stored outcome (or waits for the still-running one) instead of re-running.
+    """
+    TOOLS[name] = {
+        "name": name,
+        "handler": handler,
+        "writes": writes,
+        "error_message": error_message,
+    }
+
+def parse_arguments(tool_call):
+    raw_args = tool_call.get("function", {}).get("arguments", {})
+    return json.loads(raw_args) if isinstance(raw_args, str) else (raw_args or {})
+
+# ==========================================
+# IDEMPOTENT WRITES (keyed by toolCallId)
+# ==========================================
+def lookup_tool_call(db, tool_call_id):
+    """(status, result) recorded for this toolCallId, or None if it's free to run."""
+    row = db.get(models.ToolCallResult, tool_call_id)
+    if not row:
+        return None
+    if row.status == "running" and row.updated_at < datetime.utcnow() - STALE_CLAIM_AFTER:
+        return None
+    return row.status, row.result
+
+def run_recorded(db, tool, tool_call_id, args, message, deadline):
+    """
+    Worker-thread wrapper for write tools: claims the toolCallId, runs the
+    handler once and stores its outcome. A retried toolCallId gets the stored
+    outcome back; if another worker still holds the claim, waits for it until
+    `deadline` (time.monotonic()) and then gives the hold message.
+    """
+    table = models.ToolCallResult.__table__
+    while True:
+        now = datetime.utcnow()
+        claim = pg_insert(table).values(
+            tool_call_id=tool_call_id, tool_name=tool["name"], status="running", updated_at=now
+        )
+        claim = claim.on_conflict_do_update(
+            index_elements=[table.c.tool_call_id],
+            set_={"status": "running", "result": None, "updated_at": now},
+            where=(table.c.status == "running") & (table.c.updated_at < now - STALE_CLAIM_AFTER),
+        ).returning(table.c.tool_call_id)
+        claimed = db.execute(claim).first()
+        recorded = None if claimed else lookup_tool_call(db, tool_call_id)
+        db.commit()  # Also gives the next poll a fresh snapshot
+
+        if claimed:
+            break
+        if recorded and recorded[0] == "done":
+            print(f"🔁 [{tool['name']}] replaying recorded result for {tool_call_id}")
+            return recorded[1]
+        if time.monotonic() >= deadline:
+            return CONTROLLERS[tool["name"]].busy_message
+        # Still running elsewhere (or the claim was just dropped): poll again
+        time.sleep(RESULT_POLL_S)
+
+    result = tool["handler"](db, args, message)
+    db.rollback()  # Handlers may leave a failed transaction behind
+
+    if result == tool["error_message"]:
+        # Failed: drop the claim so a retry gets a fresh attempt
+        db.execute(delete(table).where(table.c.tool_call_id == tool_call_id))
+    else:
+        db.execute(update(table).where(table.c.tool_call_id == tool_call_id)
+                   .values(status="done", result=result, updated_at=datetime.utcnow()))
+    db.commit()
+    return result
+
+def prune_tool_call_results():
+    db = SessionLocal()
+    try:
+        db.execute(delete(models.ToolCallResult)
+                   .where(models.ToolCallResult.updated_at < datetime.utcnow() - KEEP_RESULTS_FOR))
+        db.commit()
+    finally:
+        db.close()
+
+async def tool_call_results_cleanup_loop(interval_s=60 * 60):
+    """Drops old recorded results (started from main.py)."""
+    while True:
+        try:
+            await asyncio.to_thread(prune_tool_call_results)
+        except Exception as e:
+            print(f"❌ Tool call result cleanup failed: {e}")
+        await asyncio.sleep(interval_s)
+
+# ==========================================
+# DISPATCH
+# ==========================================
+async def _acquire_before(lock, deadline):
+    """Acquires an asyncio Lock/Semaphore unless `deadline` passes first."""
+    try:
+        await asyncio.wait_for(lock.acquire(), max(deadline - time.monotonic(), 0))
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+async def dispatch(payload, default=None):
+    """
+    Runs every toolCall in the payload concurrently (bounded) and returns the
+    Vapi response body. `default` is the tool used when a call's function
+    name isn't registered (the per-tool webhook routes pass their own).
+
+    The whole message shares one deadline (the tightest budget of its tools),
+    so waiting on the write lock or a parallel slot counts against it too.
+    """
+    message = payload.get("message", {})
+    tool_calls = message.get("toolCalls", [])
+    if not tool_calls:
+        return {"results": [{"result": "Error: No data received."}]}
+
+    def resolve(tool_call):
+        return TOOLS.get(tool_call.get("function", {}).get("name")) or TOOLS.get(default)
+
+    budgets = [CONTROLLERS[tool["name"]].budget_s for tool in map(resolve, tool_calls) if tool]
+    deadline = time.monotonic() + min(budgets, default=0)
+
+    slots = asyncio.Semaphore(MAX_PARALLEL_TOOL_CALLS)
+    write_lock = asyncio.Lock()
+
+    async def run_one(tool_call):
+        tool_call_id = tool_call.get("id")
+        tool = resolve(tool_call)
+        if not tool:
+            name = tool_call.get("function", {}).get("name")
+            return {"toolCallId": tool_call_id, "result": f"Unknown tool: {name}."}
+
+        controller = CONTROLLERS[tool["name"]]
+        held = []
+
+        def release_held():
+            while held:
+                held.pop().release()
+
+        try:
+            args = parse_arguments(tool_call)
+            recorded = tool["writes"] and tool_call_id
+
+            # Writes take the lock first (FIFO) so they keep message order. The
+            # lock and slot stay held until the handler's thread finishes, even
+            # if the caller already got the hold message.
+            for lock in ([write_lock] if tool["writes"] else []) + [slots]:
+                if not await _acquire_before(lock, deadline):
+                    release_held()
+                    return {"toolCallId": tool_call_id, "result": controller.reject("queue_timeout")}
+                held.append(lock)
+
+            if recorded:
+                # The retry check is part of the admitted work, so it counts
+                # against the budget and the in-flight cap like any query
+                work = (run_recorded, tool, tool_call_id, args, message, deadline)
+            else:
+                work = (tool["handler"], args, message)
+            result = await admit(tool["name"], run_with_session, *work,
+                                 deadline=deadline, on_done=release_held)
+        except Exception as e:
+            release_held()
+            print(f"❌ ERROR [{tool['name']}]: {e}")
+            result = tool["error_message"]
+
+        return {"toolCallId": tool_call_id, "result": result}
+
+    results = await asyncio.gather(*(run_one(tool_call) for tool_call in tool_calls))
+    return {"results": list(results)}